@@ -1,3 +1,6 @@
+import os
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
 import wikipedia as wp
@@ -5,10 +8,22 @@ import geopandas as gpd
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
+from matplotlib.collections import PatchCollection
 from matplotlib.lines import Line2D
 import matplotlib.patches as patches
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 
+# Cell colors of the regime migration heatmap
+_GREENS = mpl.colormaps.get_cmap("Greens")
+_REDS = mpl.colormaps.get_cmap("Reds")
+_CMAT_HEX = [[mcolors.to_hex(c) for c in row] for row in [
+    ["white", _GREENS(0.25), _GREENS(0.45), _GREENS(0.65), "gainsboro"],
+    [_REDS(0.25), "white", _GREENS(0.25), _GREENS(0.45), "gainsboro"],
+    [_REDS(0.45), _REDS(0.25), "white", _GREENS(0.25), "gainsboro"],
+    [_REDS(0.65), _REDS(0.45), _REDS(0.25), "white", "gainsboro"],
+    ["gainsboro", "gainsboro", "gainsboro", "gainsboro", "white"],
+]]
+
 
 class Colors:
     BLACK = "#000000"
@@ -101,19 +116,37 @@ class Config:
 
 
 class Data:
+    RAW_PATH = "data/economist-democracy-index/raw/democracy_index.csv"
+    PROCESSED_PATH = \
+        "data/economist-democracy-index/processed/democracy_index.parquet"
+
     def __init__(self):
         self._setup_data()
 
+        # Year-indexed view for year lookups without scanning the column
+        self._by_year = self.df.set_index("Year").sort_index(kind="stable")
+
     def _setup_data(self) -> None:
         """
-        Load the data from the CSV file and preprocess it.
+        Load the data from the CSV file and preprocess it. The processed data
+        is stored as a Parquet file and reused while it is newer than both the
+        CSV and this module. The regime type of each row is derived from its
+        own democracy index.
         """
-        self.df = pd.read_csv(
-            "data/economist-democracy-index/raw/democracy_index.csv")
-        self.df = self.df[self.df.columns.drop(
-            list(self.df.filter(regex=' rank')))]
+        if os.path.exists(self.PROCESSED_PATH) \
+                and os.path.getmtime(self.PROCESSED_PATH) \
+                >= max(os.path.getmtime(self.RAW_PATH),
+                       os.path.getmtime(__file__)):
+            self.df = pd.read_parquet(self.PROCESSED_PATH)
+            # Parquet may restore Country with the python string storage
+            self.df["Country"] = self.df["Country"].astype("string[pyarrow]")
+            return
+
+        self.df = pd.read_csv(self.RAW_PATH)
+        self.df.drop(
+            columns=[c for c in self.df.columns if c.endswith(" rank")],
+            inplace=True)
         self.df["Region"] = self.df["Region"].astype("category")
-        self.df["RegimeType"] = self.df["RegimeType"].astype("category")
 
         self.df = self.df.melt(
             id_vars=["Region", "Country", "RegimeType"],
@@ -121,6 +154,14 @@ class Data:
             value_name="DemocracyIndex"
         )
         self.df["Year"] = self.df["Year"].astype(int)
+        self.df["Country"] = self.df["Country"].astype("string[pyarrow]")
+        self.df["RegimeType"] = self.assign_regime_types(
+            self.df["DemocracyIndex"])
+        self.df.sort_values(["Country", "Year"], kind="stable", inplace=True,
+                            ignore_index=True)
+
+        os.makedirs(os.path.dirname(self.PROCESSED_PATH), exist_ok=True)
+        self.df.to_parquet(self.PROCESSED_PATH, compression="zstd")
 
     def filter_by_region(self, regions: list[str]) -> pd.DataFrame:
         """
@@ -187,7 +228,7 @@ class Data:
         pd.DataFrame
             The filtered DataFrame.
         """
-        return self.df[self.df["Year"] == year]
+        return self._by_year.loc[year:year].reset_index()[self.df.columns]
 
     def _filter(self, key: str, values: list[str]) -> pd.DataFrame:
         """
@@ -217,8 +258,8 @@ class Data:
             A DataFrame containing the world average democracy index for each
             year.
         """
-        return self.df.groupby("Year")[
-            "DemocracyIndex"].mean().reset_index(name="DemocracyIndex")
+        return self.df.groupby("Year", as_index=False)[
+            "DemocracyIndex"].mean()
 
     def get_region_averages(self) -> pd.DataFrame:
         """
@@ -231,39 +272,32 @@ class Data:
             and year.
         """
         return self.df.groupby(
-            ["Region", "Year"], observed=True)[
-                "DemocracyIndex"].mean().reset_index(
-                    name="DemocracyIndex")
+            ["Region", "Year"], as_index=False, observed=True)[
+                "DemocracyIndex"].mean()
 
     @staticmethod
     def get_merged_dataframe() -> pd.DataFrame:
         """
         Returns a merged DataFrame of the democracy index data and the world
-        countries shapefile.
+        countries shapefile (without Antarctica).
 
         Returns
         -------
         pd.DataFrame
             A DataFrame containing the merged data.
         """
-        data = Data().df
-        countries = gpd.read_file(
-            "data/economist-democracy-index/external/ne_110m_admin_0_"
-            "countries/ne_110m_admin_0_countries.shp")
-
-        # Use names in `data`
-        to_replace = [
-            "Bosnia and Herz.", "Côte d'Ivoire", "United States of America",
-            "Central African Rep.", "Eq. Guinea", "Congo", "eSwatini",
-            "Czechia", "Dominican Rep.", "Dem. Rep. Congo", "Timor-Leste",
-            "Greenland", "Falkland Is."]
-        value = [
-            "Bosnia and Herzegovina", "Ivory Coast", "United States",
-            "Central African Republic", "Equatorial Guinea",
-            "Republic of the Congo", "Eswatini", "Czech Republic",
-            "Dominican Republic", "Democratic Republic of the Congo",
-            "East Timor", "Denmark", "Argentina"]
-        countries.replace(to_replace=to_replace, value=value, inplace=True)
+        data = _data().df
+        countries = _load_countries()
+
+        # Merge on categorical keys sharing the same (Arrow string) categories
+        country_names = countries["NAME"].astype("string[pyarrow]")
+        names = pd.api.types.union_categoricals([
+            country_names.astype("category"),
+            data["Country"].astype("category")]).categories
+        countries = countries.assign(
+            NAME=pd.Categorical(country_names, categories=names))
+        data = data.assign(
+            Country=pd.Categorical(data["Country"], categories=names))
 
         merged_df = countries.merge(data, left_on="NAME", right_on="Country",
                                     how="left")
@@ -287,13 +321,7 @@ class Data:
         pd.DataFrame
             The filtered DataFrame.
         """
-        df = Data().df
-        df = df[df["Year"] == year]
-
-        # Remap regime types to this year
-        df["RegimeType"] = df["DemocracyIndex"].apply(Data.assign_regime_type)
-
-        return df
+        return _data().filter_by_year(year)
 
     @staticmethod
     def get_yearly_geographic_data(year: int) -> pd.DataFrame:
@@ -311,14 +339,12 @@ class Data:
         pd.DataFrame
             The filtered DataFrame.
         """
-        df = Data.get_merged_dataframe()
-        df = df[df["NAME"] != "Antarctica"]
-        df = df[df["Year"] == year]
+        df = _merged()
+        years = df["Year"].to_numpy()
+        start = np.searchsorted(years, year, side="left")
+        end = np.searchsorted(years, year, side="right")
 
-        # Remap regime types to this year
-        df["RegimeType"] = df["DemocracyIndex"].apply(Data.assign_regime_type)
-
-        return df
+        return df.iloc[start:end].copy()
 
     @staticmethod
     def assign_regime_type(democracy_index: float) -> str:
@@ -344,6 +370,29 @@ class Data:
             regime_type = "Hybrid regime"
         return regime_type
 
+    @staticmethod
+    def assign_regime_types(democracy_index: pd.Series) -> pd.Series:
+        """
+        Assigns a regime type to each value of a democracy index series. This
+        is the vectorized equivalent of `assign_regime_type`.
+
+        Parameters
+        ----------
+        democracy_index : pd.Series
+            The democracy index values.
+
+        Returns
+        -------
+        pd.Series
+            The regime types, as a categorical series.
+        """
+        return pd.cut(
+            democracy_index,
+            bins=[-np.inf, 4.0, 6.0, 8.0, np.inf],
+            labels=["Authoritarian", "Hybrid regime",
+                    "Flawed democracy", "Full democracy"],
+            right=False)
+
     @staticmethod
     def get_index_change_geographic_data(start_year: int,
                                          end_year: int) -> pd.DataFrame:
@@ -365,13 +414,17 @@ class Data:
             The DataFrame containing the democracy index change and geographic
             data.
         """
-        df = Data.get_merged_dataframe()
-        df = df[df["NAME"] != "Antarctica"]
-        index_change = df[df["Year"] == end_year][
-            "DemocracyIndex"].to_numpy() \
-            - df[df["Year"] == start_year]["DemocracyIndex"].to_numpy()
+        df = _merged()
+
+        # Align both years by country instead of by row position
+        index = df.pivot_table(index="NAME", columns="Year",
+                               values="DemocracyIndex", observed=True)
+        index_change = (index[end_year] - index[start_year]).rename(
+            "IndexChange")
+
         df = df[df["Year"] == end_year]
-        df["IndexChange"] = index_change
+        df = df.merge(index_change, left_on="NAME", right_index=True,
+                      how="left")
         return df
 
     @staticmethod
@@ -399,11 +452,14 @@ class Data:
                    "Flawed democracy", "Full democracy"]
         n_regimes = len(regimes)
 
+        c1 = pd.Categorical(df1["RegimeType"], categories=regimes).codes
+        c2 = pd.Categorical(df2["RegimeType"], categories=regimes).codes
+        is_valid = (c1 >= 0) & (c2 >= 0)
+
         m = np.zeros((n_regimes + 1, n_regimes + 1))
-        for i, r1 in enumerate(regimes):
-            for j, r2 in enumerate(regimes):
-                m[i, j] = ((df1["RegimeType"].to_numpy() == r1)
-                           & (df2["RegimeType"].to_numpy() == r2)).sum()
+        m[:n_regimes, :n_regimes] = np.bincount(
+            c1[is_valid] * n_regimes + c2[is_valid],
+            minlength=n_regimes ** 2).reshape(n_regimes, n_regimes)
         m[-1, -1] = np.nan
         m[-1, :n_regimes] = np.sum(m[:n_regimes, :n_regimes], axis=0)
         m[:n_regimes, -1] = np.sum(m[:n_regimes, :n_regimes], axis=1)
@@ -433,24 +489,110 @@ class Data:
         df.to_csv("data/raw/democracy_index.csv", index=False)
 
 
+@lru_cache(maxsize=1)
+def _data() -> Data:
+    """
+    Returns a cached `Data` instance, so that the CSV is only read and
+    reshaped once per session.
+
+    Returns
+    -------
+    Data
+        The shared `Data` instance.
+    """
+    return Data()
+
+
+@lru_cache(maxsize=1)
+def _load_countries() -> gpd.GeoDataFrame:
+    """
+    Returns the world countries shapefile, parsed only once per session,
+    with country names matching the democracy index data and Antarctica
+    removed.
+
+    Returns
+    -------
+    gpd.GeoDataFrame
+        The countries GeoDataFrame.
+    """
+    countries = gpd.read_file(
+        "data/economist-democracy-index/external/ne_110m_admin_0_"
+        "countries/ne_110m_admin_0_countries.shp")
+    countries = countries[countries["NAME"] != "Antarctica"].copy()
+
+    # Use names in `data`
+    names = {
+        "Bosnia and Herz.": "Bosnia and Herzegovina",
+        "Côte d'Ivoire": "Ivory Coast",
+        "United States of America": "United States",
+        "Central African Rep.": "Central African Republic",
+        "Eq. Guinea": "Equatorial Guinea",
+        "Congo": "Republic of the Congo",
+        "eSwatini": "Eswatini",
+        "Czechia": "Czech Republic",
+        "Dominican Rep.": "Dominican Republic",
+        "Dem. Rep. Congo": "Democratic Republic of the Congo",
+        "Timor-Leste": "East Timor",
+        "Greenland": "Denmark",
+        "Falkland Is.": "Argentina",
+    }
+    countries["NAME"] = countries["NAME"].map(names).fillna(
+        countries["NAME"])
+
+    return countries
+
+
+@lru_cache(maxsize=1)
+def _merged() -> pd.DataFrame:
+    """
+    Returns a cached copy of `Data.get_merged_dataframe()`, sorted by year
+    (countries without data last). Callers must not modify the returned
+    DataFrame in place.
+
+    Returns
+    -------
+    pd.DataFrame
+        The shared merged DataFrame.
+    """
+    return Data.get_merged_dataframe().sort_values(
+        "Year", kind="stable", ignore_index=True)
+
+
+@lru_cache(maxsize=1)
+def _wide_geo() -> gpd.GeoDataFrame:
+    """
+    Returns a cached GeoDataFrame with one row per country geometry and one
+    democracy index column per year. Countries without data are excluded.
+
+    Returns
+    -------
+    gpd.GeoDataFrame
+        The wide-format geographic data.
+    """
+    index = _data().df.pivot(index="Country", columns="Year",
+                             values="DemocracyIndex")
+    return _load_countries()[["NAME", "geometry"]].merge(
+        index, left_on="NAME", right_index=True, how="inner")
+
+
 def plot_evolution_regions() -> None:
     """
     Plots the evolution of the Democracy Index by region from 2006 to 2024.
     """
-    data = Data()
+    data = _data()
 
-    regions = list(data.df["Region"].unique())
+    regions = list(data.df["Region"].cat.categories)
     region_df = data.get_region_averages()
+    region_groups = dict(list(region_df.groupby("Region", observed=True)))
+    last_values = region_df.groupby("Region", observed=True)[
+        "DemocracyIndex"].last()
     y_text_position = {
         'Asia and Australasia': 5,
         'Eastern Europe and Central Asia': 5.5,
         'Latin America and the Caribbean': 6,
-        'Middle East and North Africa': region_df[
-            region_df["Region"] == "Middle East and North Africa"][
-                "DemocracyIndex"].to_numpy()[-1],
-        'Sub-Saharan Africa': region_df[
-            region_df["Region"] == "Sub-Saharan Africa"][
-                "DemocracyIndex"].to_numpy()[-1],
+        'Middle East and North Africa': last_values[
+            "Middle East and North Africa"],
+        'Sub-Saharan Africa': last_values["Sub-Saharan Africa"],
         'North America': 8,
         'Western Europe': 9,
         }
@@ -459,7 +601,7 @@ def plot_evolution_regions() -> None:
     fig.tight_layout(rect=(0, 0.04, 0.66, 0.84))
 
     for region in regions:
-        region_data = region_df[region_df["Region"] == region]
+        region_data = region_groups[region]
         ax.plot(region_data["Year"], region_data["DemocracyIndex"],
                 marker="o", label=region, color=Config.region_colors[region],
                 linewidth=2, markersize=5)
@@ -519,7 +661,7 @@ def plot_evolution_regions() -> None:
 
 
 def plot_evolution_countries() -> None:
-    data = Data()
+    data = _data()
     countries = [
         ("Argentina", Colors.BLUE),
         ("Mali", Colors.ORANGE),
@@ -534,7 +676,6 @@ def plot_evolution_countries() -> None:
 
     for country, color in countries:
         country_data = data.df[data.df["Country"] == country]
-        country_data = country_data.sort_values(by="Year")
         ax.plot(
             country_data["Year"], country_data["DemocracyIndex"],
             marker="o", label=country, color=color, linewidth=2, markersize=5
@@ -600,7 +741,7 @@ def plot_world_map_index(year: int) -> None:
     year : int
         The year for which to plot the map.
     """
-    df = Data.get_yearly_geographic_data(year=year)
+    df = _wide_geo()
     colors = Colors()
     cmap = mpl.colormaps.get_cmap("viridis")
     vmin, vmax = 0, 10
@@ -608,8 +749,8 @@ def plot_world_map_index(year: int) -> None:
     fig, ax = plt.subplots(figsize=(9, 6.5))
 
     df.plot(
-        column="DemocracyIndex", cmap=cmap, linewidth=0.5, edgecolor="white",
-        ax=ax, legend=False,
+        column=year, cmap=cmap, linewidth=0.5, edgecolor="white",
+        ax=ax, legend=False, rasterized=True,
         legend_kwds={
             "label": "Democracy Index",
             "orientation": "horizontal",
@@ -691,7 +832,7 @@ def plot_world_map_index_change(start_year: int, end_year: int) -> None:
 
     df.plot(
         column="IndexChange", cmap=cmap, linewidth=0.5, edgecolor="white",
-        ax=ax, legend=False,
+        ax=ax, legend=False, rasterized=True,
         vmin=vmin, vmax=vmax,
         missing_kwds={
             "color": colors.LIGHT_GRAY,
@@ -752,10 +893,8 @@ def plot_regions() -> None:
 
     fig, ax = plt.subplots(figsize=(9, 6.5))
 
-    for region, color in config.region_colors.items():
-        region_df = df[df["Region"] == region]
-        region_df.plot(ax=ax, color=color, linewidth=0.5,
-                       edgecolor="white", label=region)
+    df.plot(ax=ax, color=df["RegionColor"].to_numpy(), linewidth=0.5,
+            edgecolor="white", rasterized=True)
 
     ax.axis("off")
 
@@ -810,26 +949,16 @@ def plot_regime_migration(start_year: int, end_year: int) -> None:
 
     mask = np.isnan(m)
 
-    greens = mpl.colormaps.get_cmap("Greens")
-    reds = mpl.colormaps.get_cmap("Reds")
-    cmat = [
-        ["white",  greens(0.25), greens(0.45), greens(0.65), "gainsboro"],
-        [reds(0.25), "white", greens(0.25), greens(0.45), "gainsboro"],
-        [reds(0.45), reds(0.25), "white", greens(0.25), "gainsboro"],
-        [reds(0.65), reds(0.45), reds(0.25), "white", "gainsboro"],
-        ["gainsboro", "gainsboro", "gainsboro", "gainsboro", "white"]
-    ]
-    cmat_hex = [[mcolors.to_hex(c) if isinstance(c, str) or isinstance(c, tuple) else c for c in row] for row in cmat]
-
-    for i in range(m.shape[0]):
-        for j in range(m.shape[1]):
-            if not mask[i, j]:
-                color = cmat_hex[i][j]
-                rect = plt.Rectangle([j, i], 1, 1, facecolor=color, edgecolor="white", linewidth=3)
-                ax.add_patch(rect)
-                value = str(int(m[i, j]))
-                ax.text(j + 0.5, i + 0.5, value, ha="center", va="center",
-                        fontsize=18, color=Colors.DARK_GRAY, weight="bold")
+    cells = [(i, j) for i in range(m.shape[0]) for j in range(m.shape[1])
+             if not mask[i, j]]
+    ax.add_collection(PatchCollection(
+        [patches.Rectangle((j, i), 1, 1) for i, j in cells],
+        facecolors=[_CMAT_HEX[i][j] for i, j in cells],
+        edgecolors="white", linewidths=3))
+    for i, j in cells:
+        value = str(int(m[i, j]))
+        ax.text(j + 0.5, i + 0.5, value, ha="center", va="center",
+                fontsize=18, color=Colors.DARK_GRAY, weight="bold")
 
     # Set axis labels
     for i, label in enumerate(column_labels[::-1]):